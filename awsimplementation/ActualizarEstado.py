@@ -0,0 +1,100 @@
+import boto3
+import os
+import json
+import time
+import traceback
+
+from metricas import instrumentar
+from archivo import DIAS_ARCHIVO
+from comun import json_default
+from estadisticas import registrar_cambio_estado
+
+ESTADOS_VALIDOS = ["pendiente", "en atención", "resuelto"]
+
+dynamodb = boto3.resource("dynamodb")
+table_name = os.environ.get("TABLE_NAME", "dev-t_reportes")
+reportes_table = dynamodb.Table(table_name)
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        path_params = event.get("pathParameters") or {}
+        query_params = event.get("queryStringParameters") or {}
+
+        tenant_id = query_params.get("tenant_id") or "utec"
+        uuid = path_params.get("uuid")
+
+        raw_body = event.get("body", "{}")
+        if isinstance(raw_body, str):
+            body = json.loads(raw_body)
+        else:
+            body = raw_body
+
+        estado = body.get("estado")
+
+        if not uuid:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Debe enviar uuid en la ruta /reporte/{uuid}/estado"})
+            }
+
+        if estado not in ESTADOS_VALIDOS:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": f"Estado inválido, use uno de: {ESTADOS_VALIDOS}"})
+            }
+
+        # Los reportes resueltos expiran por TTL y pasan al almacén frío;
+        # si se reabren se quita la expiración
+        if estado == "resuelto":
+            update_expression = "SET estado = :e, expira_en = :t"
+            values = {":e": estado, ":t": int(time.time()) + DIAS_ARCHIVO * 86400}
+        else:
+            update_expression = "SET estado = :e REMOVE expira_en"
+            values = {":e": estado}
+
+        try:
+            response = reportes_table.update_item(
+                Key={"tenant_id": tenant_id, "uuid": uuid},
+                UpdateExpression=update_expression,
+                ConditionExpression="attribute_exists(#u)",
+                ExpressionAttributeNames={"#u": "uuid"},
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_OLD"
+            )
+        except reportes_table.meta.client.exceptions.ConditionalCheckFailedException:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"error": "El reporte no existe"})
+            }
+
+        print(f"✅ Reporte {uuid} actualizado a estado: {estado}")
+
+        anterior = response["Attributes"]
+        item = {**anterior, "estado": estado}
+        if estado == "resuelto":
+            item["expira_en"] = values[":t"]
+        else:
+            item.pop("expira_en", None)
+
+        try:
+            registrar_cambio_estado(tenant_id, anterior.get("estado", "pendiente"), estado)
+        except Exception as e:
+            print(f"⚠️ No se pudieron actualizar las estadísticas: {str(e)}")
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "mensaje": "Estado actualizado",
+                "item": item
+            }, default=json_default)
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
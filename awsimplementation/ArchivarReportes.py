@@ -0,0 +1,37 @@
+import traceback
+from boto3.dynamodb.types import TypeDeserializer
+
+from metricas import instrumentar
+from archivo import archivar_reporte
+from comun import es_expiracion_ttl
+
+deserializer = TypeDeserializer()
+
+
+@instrumentar
+def lambda_handler(event, context):
+    archivados = 0
+    fallidos = []
+
+    for record in event.get("Records", []):
+        if record.get("eventName") != "REMOVE" or not es_expiracion_ttl(record):
+            continue
+
+        old_image = record["dynamodb"].get("OldImage")
+        if not old_image:
+            continue
+
+        reporte = {k: deserializer.deserialize(v) for k, v in old_image.items()}
+
+        try:
+            archivar_reporte(reporte)
+            archivados += 1
+        except Exception as e:
+            print(f"❌ Error archivando {reporte.get('uuid')}: {str(e)}")
+            traceback.print_exc()
+            fallidos.append({"itemIdentifier": record["dynamodb"]["SequenceNumber"]})
+
+    print(f"📦 Reportes archivados: {archivados}, fallidos: {len(fallidos)}")
+
+    # Solo se reintentan los registros que fallaron
+    return {"batchItemFailures": fallidos}
@@ -0,0 +1,50 @@
+import json
+import traceback
+
+from metricas import instrumentar
+from busqueda import buscar
+from estadisticas import obtener_estadisticas
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        query_params = event.get("queryStringParameters") or {}
+        tenant_id = query_params.get("tenant_id") or "utec"
+        consulta = (query_params.get("q") or "").strip()
+
+        try:
+            pagina = int(query_params.get("pagina") or 1)
+            limite = int(query_params.get("limite") or 20)
+        except ValueError:
+            pagina = limite = 0
+        if pagina <= 0 or limite <= 0:
+            return {"statusCode": 400, "body": json.dumps({"error": "pagina y limite deben ser enteros mayores que 0"})}
+        limite = min(limite, 100)
+
+        if not consulta:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"error": "Debe enviar el parámetro q"})
+            }
+
+        total_reportes = obtener_estadisticas(tenant_id)["total"]
+        resultado = buscar(tenant_id, consulta, total_reportes, pagina, limite)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "mensaje": "Búsqueda realizada correctamente",
+                "pagina": pagina,
+                "limite": limite,
+                **resultado
+            })
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
@@ -1,14 +1,64 @@
 import json
 import boto3
-import uuid
 import os
 import traceback
 
+from metricas import instrumentar
+from comun import uuid7, fecha_iso, json_default
+from busqueda import indexar_reporte
+from estadisticas import actualizacion_creacion, registrar_creacion
+from idempotencia import obtener_clave, hash_solicitud, reservar, registrar_paso, guardar_respuesta, liberar, respuesta_guardada
+from ubicaciones import actualizacion_ubicacion, canonizar, coordenadas, registrar_ubicacion
+
 dynamodb = boto3.resource("dynamodb")
 table_name = os.environ.get("TABLE_NAME", "dev-t_reportes")
 reportes_table = dynamodb.Table(table_name)
-connections_table = dynamodb.Table(os.environ.get("CONNECTIONS_TABLE", "Connections"))
 
+# Escrituras derivadas del reporte (estadísticas, búsqueda y ubicaciones).
+# Con Idempotency-Key cada una se marca en el item de la clave, y al retomar
+# una reserva solo se hacen las que no figuran en "hechos".
+def escrituras_derivadas(reporte, clave, hechos):
+    tenant_id = reporte["tenant_id"]
+
+    if "estadisticas" not in hechos:
+        try:
+            if clave:
+                registrar_paso(tenant_id, clave, "estadisticas", actualizacion_creacion(reporte))
+            else:
+                registrar_creacion(reporte)
+        except Exception as e:
+            print(f"⚠️ No se pudieron actualizar las estadísticas: {str(e)}")
+
+    # indexar_reporte solo hace put_item, repetirlo no cambia el índice
+    if "busqueda" not in hechos:
+        try:
+            indexar_reporte(reporte)
+            if clave:
+                registrar_paso(tenant_id, clave, "busqueda")
+        except Exception as e:
+            print(f"⚠️ No se pudo indexar el reporte para búsqueda: {str(e)}")
+
+    if "ubicacion" not in hechos:
+        try:
+            if clave:
+                registrar_paso(tenant_id, clave, "ubicacion", actualizacion_ubicacion(reporte))
+            else:
+                registrar_ubicacion(reporte)
+        except Exception as e:
+            print(f"⚠️ No se pudo registrar la ubicación: {str(e)}")
+
+def completar(tenant_id, clave, uuid_reporte, reporte):
+    respuesta = {"statusCode": 200, "body": json.dumps({"mensaje": "Reporte creado", "uuid": uuid_reporte, "reporte": reporte}, default=json_default)}
+
+    if clave:
+        try:
+            guardar_respuesta(tenant_id, clave, respuesta)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la respuesta idempotente: {str(e)}")
+
+    return respuesta
+
+@instrumentar
 def lambda_handler(event, context):
     try:
         # El body puede venir como string o dict dependiendo de cómo lo envíe API Gateway
@@ -24,7 +74,8 @@ def lambda_handler(event, context):
         if missing:
             return {"statusCode": 400, "body": json.dumps({"error": f"Faltan campos: {missing}"})}
 
-        uuidv4 = str(uuid.uuid4())
+        # Id ordenado por tiempo (UUIDv7) para poder listar del más reciente al más antiguo
+        uuid_reporte = uuid7()
         tenant_id = body.get("tenant_id", "utec")
         
         # nivel_urgencia es opcional, con valor por defecto
@@ -32,45 +83,67 @@ def lambda_handler(event, context):
 
         reporte = {
             "tenant_id": tenant_id,
-            "uuid": uuidv4,
+            "uuid": uuid_reporte,
             "tipo_incidente": body["tipo_incidente"],
             "nivel_urgencia": nivel_urgencia,
             "ubicacion": body["ubicacion"],
             "tipo_usuario": body["tipo_usuario"],
             "descripcion": body["descripcion"],
-            "estado": "pendiente"
+            "estado": "pendiente",
+            "fecha_creacion": fecha_iso(),
+            "ubicacion_codigo": canonizar(body["ubicacion"])
         }
 
-        # Guardar en dev-t_reportes
-        reportes_table.put_item(Item=reporte)
-        print(f"✅ Reporte guardado: {uuidv4}")
+        # Coordenadas opcionales para el mapa
+        coords = coordenadas(body)
+        if coords:
+            reporte["lat"], reporte["lng"] = coords
+
+        # Con Idempotency-Key, los reintentos reciben la respuesta original
+        # sin volver a escribir el reporte
+        clave = obtener_clave(event, body)
+        if clave:
+            hash_body = hash_solicitud(body)
+            reservada, item = reservar(tenant_id, clave, hash_body, uuid_reporte)
+            if not reservada:
+                print(f"🔁 Reintento con Idempotency-Key {clave}, se devuelve la respuesta original")
+                return respuesta_guardada(item, hash_body)
 
-        # Notificar por WebSocket a todos los conectados
+            # Si se retomó una reserva vencida se usa el uuid de la primera solicitud
+            uuid_reporte = item["uuid"]
+            reporte["uuid"] = uuid_reporte
+
+        # Guardar en dev-t_reportes
         try:
-            domain = event["requestContext"]["domainName"]
-            stage = event["requestContext"]["stage"]
-            ws_endpoint = f"https://{domain}/{stage}"
-            
-            api = boto3.client("apigatewaymanagementapi", endpoint_url=ws_endpoint)
-            connections = connections_table.scan().get("Items", [])
-            
-            message = {
-                "type": "nuevoReporte",
-                "data": reporte
-            }
-            
-            for conn in connections:
-                try:
-                    api.post_to_connection(
-                        ConnectionId=conn["connectionId"],
-                        Data=json.dumps(message)
-                    )
-                except Exception as e:
-                    print(f"⚠️ Error enviando a {conn.get('connectionId', 'unknown')}: {str(e)}")
-        except Exception as e:
-            print(f"⚠️ No se pudo notificar por WebSocket: {str(e)}")
+            if clave:
+                # La primera solicitud pudo guardar el reporte antes de fallar
+                reportes_table.put_item(
+                    Item=reporte,
+                    ConditionExpression="attribute_not_exists(#u)",
+                    ExpressionAttributeNames={"#u": "uuid"}
+                )
+            else:
+                reportes_table.put_item(Item=reporte)
+        except reportes_table.meta.client.exceptions.ConditionalCheckFailedException:
+            reporte = reportes_table.get_item(
+                Key={"tenant_id": tenant_id, "uuid": uuid_reporte},
+                ConsistentRead=True
+            )["Item"]
+            print(f"🔁 El reporte {uuid_reporte} ya existía, se completa la clave {clave}")
+            escrituras_derivadas(reporte, clave, item.get("pasos", {}))
+            return completar(tenant_id, clave, uuid_reporte, reporte)
+        except Exception:
+            if clave:
+                liberar(tenant_id, clave)
+            raise
+        print(f"✅ Reporte guardado: {uuid_reporte}")
+
+        escrituras_derivadas(reporte, clave, item.get("pasos", {}) if clave else {})
+
+        # La notificación por WebSocket la hace DifundirReportes desde el stream
+        # de la tabla, agrupando los reportes que llegan en ráfaga
 
-        return {"statusCode": 200, "body": json.dumps({"mensaje": "Reporte creado", "uuid": uuidv4, "reporte": reporte})}
+        return completar(tenant_id, clave, uuid_reporte, reporte)
 
     except Exception as e:
         traceback.print_exc()
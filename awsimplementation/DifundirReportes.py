@@ -0,0 +1,52 @@
+import traceback
+from boto3.dynamodb.types import TypeDeserializer
+
+from metricas import instrumentar
+from comun import es_expiracion_ttl
+from difusion import cliente_ws, difundir
+
+deserializer = TypeDeserializer()
+
+# El stream agrupa los cambios de la ventana de batching (maximumBatchingWindow)
+# y se envía un reportesBatch por conexión en lugar de uno por reporte (partido
+# en varios frames si supera el límite de API Gateway)
+@instrumentar
+def lambda_handler(event, context):
+    reportes = {}
+    eliminados = []
+
+    for record in event.get("Records", []):
+        keys = record["dynamodb"]["Keys"]
+        uuid = deserializer.deserialize(keys["uuid"])
+
+        if record["eventName"] == "REMOVE":
+            # Los archivados por TTL siguen existiendo en el almacén frío
+            if es_expiracion_ttl(record):
+                continue
+            reportes.pop(uuid, None)
+            eliminados.append(uuid)
+            continue
+
+        new_image = record["dynamodb"]["NewImage"]
+        # Si el mismo reporte cambia varias veces en la ventana, solo vale la última versión
+        reportes[uuid] = {k: deserializer.deserialize(v) for k, v in new_image.items()}
+        if uuid in eliminados:
+            eliminados.remove(uuid)
+
+    if not reportes and not eliminados:
+        return {"enviados": 0}
+
+    try:
+        enviados = difundir(cliente_ws(), {
+            "type": "reportesBatch",
+            "reportes": list(reportes.values()),
+            "eliminados": eliminados
+        })
+    except Exception as e:
+        # No reintentar el lote: una notificación perdida es mejor que bloquear el stream
+        print(f"⚠️ No se pudo notificar por WebSocket: {str(e)}")
+        traceback.print_exc()
+        return {"enviados": 0}
+
+    print(f"📣 Lote de {len(reportes)} reportes y {len(eliminados)} eliminados enviado a {enviados} conexiones")
+    return {"enviados": enviados}
@@ -3,6 +3,12 @@ import os
 import json
 import traceback
 
+from metricas import instrumentar
+from busqueda import desindexar_reporte
+from estadisticas import registrar_eliminacion
+from ubicaciones import quitar_ubicacion
+
+@instrumentar
 def lambda_handler(event, context):
     try:
         path_params = event.get("pathParameters") or {}
@@ -46,12 +52,30 @@ def lambda_handler(event, context):
             }
 
         # Eliminar
-        table.delete_item(
-            Key={"tenant_id": tenant_id, "uuid": uuid}
+        deleted = table.delete_item(
+            Key={"tenant_id": tenant_id, "uuid": uuid},
+            ReturnValues="ALL_OLD"
         )
         
         print(f"✅ Reporte eliminado correctamente: {uuid}")
 
+        # Solo descuenta quien realmente borró el item (evita doble descuento)
+        if "Attributes" in deleted:
+            try:
+                registrar_eliminacion(deleted["Attributes"])
+            except Exception as e:
+                print(f"⚠️ No se pudieron actualizar las estadísticas: {str(e)}")
+
+            try:
+                desindexar_reporte(deleted["Attributes"])
+            except Exception as e:
+                print(f"⚠️ No se pudo quitar el reporte del índice de búsqueda: {str(e)}")
+
+            try:
+                quitar_ubicacion(deleted["Attributes"])
+            except Exception as e:
+                print(f"⚠️ No se pudo descontar la ubicación: {str(e)}")
+
         return {
             "statusCode": 200,
             "headers": {
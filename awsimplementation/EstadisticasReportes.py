@@ -0,0 +1,29 @@
+import json
+import traceback
+
+from metricas import instrumentar
+from estadisticas import obtener_estadisticas
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        query_params = event.get("queryStringParameters") or {}
+        tenant_id = query_params.get("tenant_id") or "utec"
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "mensaje": "Estadísticas obtenidas correctamente",
+                "tenant_id": tenant_id,
+                "stats": obtener_estadisticas(tenant_id)
+            })
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
@@ -0,0 +1,36 @@
+import json
+import traceback
+
+from metricas import instrumentar
+from ubicaciones import hotspots
+
+@instrumentar
+def lambda_handler(event, context):
+    try:
+        query_params = event.get("queryStringParameters") or {}
+        tenant_id = query_params.get("tenant_id") or "utec"
+
+        try:
+            dias = int(query_params.get("dias") or 7)
+        except ValueError:
+            dias = 0
+        if dias <= 0:
+            return {"statusCode": 400, "body": json.dumps({"error": "dias debe ser un entero mayor que 0"})}
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "mensaje": "Ubicaciones obtenidas correctamente",
+                "tenant_id": tenant_id,
+                **hotspots(tenant_id, dias)
+            })
+        }
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": str(e)})
+        }
@@ -1,43 +1,97 @@
 import boto3
 import os
 import json
+import base64
 import traceback
 from boto3.dynamodb.conditions import Key
 
+from metricas import instrumentar
+from comun import json_default
+
+# GSI tenant_id + fecha_creacion para listar por fecha sin ordenar en el cliente
+INDICE_FECHA = os.environ.get("FECHA_INDEX", "tenant_fecha")
+
+def codificar_cursor(last_key):
+    return base64.urlsafe_b64encode(json.dumps(last_key, default=json_default).encode("utf-8")).decode("ascii")
+
+def decodificar_cursor(cursor):
+    # Devuelve None si el cursor no es uno generado por codificar_cursor
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    return clave if isinstance(clave, dict) else None
+
+@instrumentar
 def lambda_handler(event, context):
     try:
         # Obtener tenant_id desde query params
         query_params = event.get("queryStringParameters") or {}
         tenant_id = query_params.get("tenant_id") or "utec"
-        
+
+        # Ventana de tiempo opcional (fechas ISO 8601) y paginación
+        desde = query_params.get("desde")
+        hasta = query_params.get("hasta")
+        limite = query_params.get("limite")
+        cursor = query_params.get("cursor")
+
         print(f"Listando reportes para tenant: {tenant_id}")
 
         nombre_tabla = os.environ.get("TABLE_NAME", "dev-t_reportes")
         print(f"Usando tabla: {nombre_tabla}")
-        
+
         dynamodb = boto3.resource("dynamodb")
         table = dynamodb.Table(nombre_tabla)
 
-        # Query por tenant_id (HASH KEY)
-        response = table.query(
-            KeyConditionExpression=Key('tenant_id').eq(tenant_id)
-        )
+        condicion = Key('tenant_id').eq(tenant_id)
+        if desde and hasta:
+            condicion = condicion & Key('fecha_creacion').between(desde, hasta)
+        elif desde:
+            condicion = condicion & Key('fecha_creacion').gte(desde)
+        elif hasta:
+            condicion = condicion & Key('fecha_creacion').lte(hasta)
+
+        # Query por tenant_id (HASH KEY), del más reciente al más antiguo
+        kwargs = {
+            "IndexName": INDICE_FECHA,
+            "KeyConditionExpression": condicion,
+            "ScanIndexForward": False
+        }
+        if limite:
+            try:
+                limite = int(limite)
+            except ValueError:
+                limite = 0
+            if limite <= 0:
+                return {"statusCode": 400, "body": json.dumps({"error": "limite debe ser un entero mayor que 0"})}
+            kwargs["Limit"] = limite
+        if cursor:
+            inicio = decodificar_cursor(cursor)
+            # Un cursor de otro tenant o sin las claves del índice también es inválido
+            if inicio is None or inicio.get("tenant_id") != tenant_id or not {"uuid", "fecha_creacion"} <= inicio.keys():
+                return {"statusCode": 400, "body": json.dumps({"error": "cursor inválido"})}
+            kwargs["ExclusiveStartKey"] = inicio
+
+        response = table.query(**kwargs)
 
         items = response.get("Items", [])
         print(f"Se encontraron {len(items)} reportes")
 
+        last_key = response.get("LastEvaluatedKey")
+
         return {
             "statusCode": 200,
             "body": json.dumps({
                 "mensaje": "Reportes obtenidos correctamente",
-                "items": items
-            })
+                "items": items,
+                "cursor": codificar_cursor(last_key) if last_key else None
+            }, default=json_default)
         }
 
     except Exception as e:
         print(f"Error: {str(e)}")
         traceback.print_exc()
-        
+
         return {
             "statusCode": 500,
             "body": json.dumps({
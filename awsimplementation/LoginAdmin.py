@@ -2,9 +2,12 @@ import boto3
 import json
 import traceback
 
+from metricas import instrumentar
+
 dynamodb = boto3.resource("dynamodb")
 admins_table = dynamodb.Table("admins")
 
+@instrumentar
 def lambda_handler(event, context):
     try:
         # Parsear body
@@ -3,6 +3,11 @@ import os
 import json
 import traceback
 
+from metricas import instrumentar
+from archivo import obtener_archivado
+from comun import json_default
+
+@instrumentar
 def lambda_handler(event, context):
     try:
         path_params = event.get("pathParameters") or {}
@@ -28,7 +33,18 @@ def lambda_handler(event, context):
             }
         )
 
-        if "Item" not in response:
+        if "Item" in response:
+            return {
+                "statusCode": 200,
+                "body": json.dumps({
+                    "mensaje": "Reporte encontrado",
+                    "item": response["Item"]
+                }, default=json_default)
+            }
+
+        # Si no está en la tabla caliente puede haber sido archivado
+        archivado = obtener_archivado(tenant_id, uuid)
+        if archivado is None:
             return {
                 "statusCode": 404,
                 "body": json.dumps({"error": "El reporte no existe"})
@@ -38,7 +54,8 @@ def lambda_handler(event, context):
             "statusCode": 200,
             "body": json.dumps({
                 "mensaje": "Reporte encontrado",
-                "item": response["Item"]
+                "item": archivado,
+                "archivado": True
             })
         }
 
@@ -3,9 +3,12 @@ import json
 import traceback
 import re
 
+from metricas import instrumentar
+
 dynamodb = boto3.resource("dynamodb")
 admins_table = dynamodb.Table("admins")
 
+@instrumentar
 def lambda_handler(event, context):
     try:
         # Parsear body
@@ -3,11 +3,29 @@ from airflow.operators.python import PythonOperator
 from airflow.providers.slack.operators.slack_api import SlackAPIPostOperator
 from airflow.providers.sendgrid.operators.sendgrid import SendGridOperator
 from datetime import datetime
+from boto3.dynamodb.conditions import Key
 import boto3
+import hashlib
 import json
-import pandas as pd
+import os
+import re
 import openpyxl
 
+TABLE_NAME = os.environ.get("TABLE_NAME", "dev-t_reportes")
+STATS_TABLE = os.environ.get("STATS_TABLE", "dev-t_estadisticas")
+
+# Columnas del reporte Excel: (campo en DynamoDB, encabezado)
+COLUMNAS_REPORTE = [
+    ("uuid", "id"),
+    ("fecha_creacion", "fecha"),
+    ("tipo_incidente", "tipo"),
+    ("descripcion", "descripcion"),
+    ("ubicacion", "ubicacion"),
+    ("nivel_urgencia", "urgencia"),
+    ("tipo_usuario", "rol"),
+    ("estado", "estado")
+]
+
 # Diccionario de tipos de incidente a nivel de urgencia
 TIPO_INCIDENTE_URGENCIA = {
     "Robo": "Alta",
@@ -74,38 +92,78 @@ def enviar_notificacion_slack(incident, **kwargs):
         text=slack_message
     ).execute(context=kwargs)
 
-# Función para generar un reporte estadístico
-def generar_reporte_estadistico(**kwargs):
-    # Obtener los incidentes desde DynamoDB o base de datos
-    incidentes = [
-        {'id': 1, 'tipo': 'Robo', 'descripcion': 'Robo de celular', 'ubicacion': 'Edificio A', 'urgencia': 'Alta', 'rol': 'Estudiante'},
-        {'id': 2, 'tipo': 'Accidente', 'descripcion': 'Accidente de tráfico', 'ubicacion': 'Avenida principal', 'urgencia': 'Media', 'rol': 'Estudiante'}
-    ]
-
-    # Crear un DataFrame con los incidentes
-    df = pd.DataFrame(incidentes)
-
-    # Generar un archivo Excel
-    filename = '/tmp/reporte_incidentes.xlsx'
-    df.to_excel(filename, index=False)
-
-    # Devolver la ruta del archivo para que pueda ser enviado por correo o procesado
-    return filename
-
-# Función para enviar el reporte por correo electrónico
-def enviar_reporte_por_correo(**kwargs):
-    # Recuperar la ubicación del archivo generado
-    reporte_path = kwargs['ti'].xcom_pull(task_ids='generar_reporte_estadistico')
-    
+# Función para listar los tenants: la tabla de estadísticas tiene un item
+# pequeño por tenant, así que no hace falta recorrer todos los reportes.
+# Los tenants con reportes anteriores a los contadores aparecen recién después
+# de correr el backfill awsimplementation/reconstruir_estadisticas.py
+def listar_tenants(**kwargs):
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(STATS_TABLE)
+
+    tenants = []
+    scan_kwargs = {"ProjectionExpression": "tenant_id"}
+    while True:
+        response = table.scan(**scan_kwargs)
+        tenants.extend(item["tenant_id"] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    # Un dict por tenant para expandir una tarea de reporte por cada uno
+    return [{"tenant_id": tenant_id} for tenant_id in sorted(tenants)]
+
+# Nombre de archivo seguro para un tenant: tenant_id viene del cliente y
+# puede traer "/" o ".."; si hubo que limpiarlo se agrega un hash para que
+# dos tenants distintos no terminen en el mismo archivo
+def nombre_archivo_tenant(tenant_id):
+    limpio = re.sub(r"[^A-Za-z0-9_-]", "_", str(tenant_id))[:64]
+    if limpio != tenant_id:
+        limpio = f"{limpio}_{hashlib.sha256(str(tenant_id).encode('utf-8')).hexdigest()[:8]}"
+    return f"reporte_incidentes_{limpio}.xlsx"
+
+# Función para generar el reporte estadístico de un tenant
+def generar_reporte_estadistico(tenant_id, **kwargs):
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(TABLE_NAME)
+
+    # Workbook en modo write_only: las filas se escriben a disco a medida que
+    # llegan las páginas de DynamoDB, sin tener todo el reporte en memoria
+    workbook = openpyxl.Workbook(write_only=True)
+    hoja = workbook.create_sheet("Incidentes")
+    hoja.append([encabezado for _, encabezado in COLUMNAS_REPORTE])
+
+    total = 0
+    query_kwargs = {
+        "KeyConditionExpression": Key("tenant_id").eq(tenant_id),
+        "Limit": 500
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get("Items", []):
+            hoja.append([str(item.get(campo, "")) for campo, _ in COLUMNAS_REPORTE])
+            total += 1
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    filename = os.path.join("/tmp", nombre_archivo_tenant(tenant_id))
+    workbook.save(filename)
+    print(f"Reporte de {tenant_id} generado con {total} incidentes: {filename}")
+
+    # Devolver los argumentos para la tarea de envío por correo de este tenant
+    return {"tenant_id": tenant_id, "reporte_path": filename}
+
+# Función para enviar el reporte de un tenant por correo electrónico
+def enviar_reporte_por_correo(tenant_id, reporte_path, **kwargs):
     return SendGridOperator(
         task_id="enviar_reporte_correo",
         api_key="tu-api-key-de-sendgrid",
         to=["responsable@tucorreo.com"],
-        subject="Reporte de Incidentes",
-        html_content="Aquí está el reporte de incidentes.",
+        subject=f"Reporte de Incidentes - {tenant_id}",
+        html_content=f"Aquí está el reporte de incidentes del tenant {tenant_id}.",
         attachments=[{
             "file": reporte_path,
-            "filename": "reporte_incidentes.xlsx"
+            "filename": os.path.basename(reporte_path)
         }]
     ).execute(context=kwargs)
 
@@ -127,20 +185,24 @@ with DAG('clasificacion_incidentes', start_date=datetime(2023, 11, 16), catchup=
         provide_context=True
     )
 
-    # Tarea para generar reporte estadístico
-    tarea_generar_reporte = PythonOperator(
-        task_id="generar_reporte_estadistico",
-        python_callable=generar_reporte_estadistico,
-        provide_context=True
+    # Tarea para listar los tenants
+    tarea_listar_tenants = PythonOperator(
+        task_id="listar_tenants",
+        python_callable=listar_tenants
     )
 
-    # Tarea para enviar el reporte por correo
-    tarea_enviar_reporte = PythonOperator(
+    # Un reporte estadístico por tenant, en paralelo (dynamic task mapping)
+    tarea_generar_reporte = PythonOperator.partial(
+        task_id="generar_reporte_estadistico",
+        python_callable=generar_reporte_estadistico
+    ).expand(op_kwargs=tarea_listar_tenants.output)
+
+    # Un correo por tenant con su reporte
+    tarea_enviar_reporte = PythonOperator.partial(
         task_id="enviar_reporte_correo",
-        python_callable=enviar_reporte_por_correo,
-        provide_context=True
-    )
+        python_callable=enviar_reporte_por_correo
+    ).expand(op_kwargs=tarea_generar_reporte.output)
 
     # Definir las dependencias entre las tareas
     tarea_clasificar >> tarea_notificar_slack
-    tarea_generar_reporte >> tarea_enviar_reporte
+    tarea_listar_tenants >> tarea_generar_reporte >> tarea_enviar_reporte
@@ -0,0 +1,37 @@
+import boto3
+import gzip
+import json
+import os
+
+from comun import json_default
+
+# Almacén frío: un objeto JSON comprimido con gzip por reporte en S3
+s3 = boto3.client("s3")
+archivo_bucket = os.environ.get("ARCHIVE_BUCKET", "dev-t-reportes-archivo")
+
+# Días que un reporte resuelto permanece en la tabla caliente antes de archivarse
+DIAS_ARCHIVO = int(os.environ.get("DIAS_ARCHIVO", "30"))
+
+
+def archivo_key(tenant_id, uuid):
+    return f"{tenant_id}/{uuid}.json.gz"
+
+
+def archivar_reporte(reporte):
+    data = gzip.compress(json.dumps(reporte, default=json_default).encode("utf-8"))
+    s3.put_object(
+        Bucket=archivo_bucket,
+        Key=archivo_key(reporte["tenant_id"], reporte["uuid"]),
+        Body=data,
+        ContentType="application/json",
+        ContentEncoding="gzip"
+    )
+
+
+def obtener_archivado(tenant_id, uuid):
+    try:
+        response = s3.get_object(Bucket=archivo_bucket, Key=archivo_key(tenant_id, uuid))
+    except s3.exceptions.NoSuchKey:
+        return None
+
+    return json.loads(gzip.decompress(response["Body"].read()))
@@ -0,0 +1,95 @@
+import boto3
+import math
+import os
+import re
+import unicodedata
+from boto3.dynamodb.conditions import Key
+
+# Índice invertido por tenant: un item por (tenant, término, reporte).
+# Se mantiene en cada escritura para buscar sin escanear la tabla de reportes.
+dynamodb = boto3.resource("dynamodb")
+busqueda_table = dynamodb.Table(os.environ.get("SEARCH_TABLE", "dev-t_busqueda"))
+
+# Los términos de la ubicación pesan más que los de la descripción
+CAMPOS_INDEXADOS = {"ubicacion": 2, "descripcion": 1}
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "me", "mi", "no", "o", "para", "por", "que", "se", "su", "un", "una", "y"
+}
+
+
+# Minúsculas y sin tildes, para que "atención" y "atencion" coincidan
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    return [t for t in re.findall(r"\w+", normalizar(texto)) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _termino(tenant_id, token):
+    return f"{tenant_id}#{token}"
+
+
+def pesos_reporte(reporte):
+    pesos = {}
+    for campo, peso in CAMPOS_INDEXADOS.items():
+        for token in tokenizar(reporte.get(campo)):
+            pesos[token] = pesos.get(token, 0) + peso
+    return pesos
+
+
+def indexar_reporte(reporte):
+    with busqueda_table.batch_writer() as batch:
+        for token, peso in pesos_reporte(reporte).items():
+            batch.put_item(Item={
+                "termino": _termino(reporte["tenant_id"], token),
+                "uuid": reporte["uuid"],
+                "peso": peso
+            })
+
+
+def desindexar_reporte(reporte):
+    with busqueda_table.batch_writer() as batch:
+        for token in pesos_reporte(reporte):
+            batch.delete_item(Key={"termino": _termino(reporte["tenant_id"], token), "uuid": reporte["uuid"]})
+
+
+def _postings(tenant_id, token):
+    kwargs = {
+        "KeyConditionExpression": Key("termino").eq(_termino(tenant_id, token)),
+        "ProjectionExpression": "#u, peso",
+        "ExpressionAttributeNames": {"#u": "uuid"}
+    }
+    while True:
+        response = busqueda_table.query(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Ranking TF-IDF: los términos que aparecen en pocos reportes pesan más
+def buscar(tenant_id, consulta, total_reportes, pagina=1, limite=20):
+    puntajes = {}
+    for token in set(tokenizar(consulta)):
+        postings = list(_postings(tenant_id, token))
+        if not postings:
+            continue
+
+        idf = math.log(1 + max(total_reportes, len(postings)) / len(postings))
+        for p in postings:
+            puntajes[p["uuid"]] = puntajes.get(p["uuid"], 0) + float(p["peso"]) * idf
+
+    ordenados = sorted(puntajes.items(), key=lambda x: (-x[1], x[0]))
+    inicio = (pagina - 1) * limite
+
+    return {
+        "total": len(ordenados),
+        "resultados": [
+            {"uuid": uuid, "puntaje": round(puntaje, 4)}
+            for uuid, puntaje in ordenados[inicio:inicio + limite]
+        ]
+    }
@@ -0,0 +1,35 @@
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+# DynamoDB devuelve los números como Decimal, que json.dumps no sabe serializar
+def json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+# UUIDv7: los primeros 48 bits son el timestamp en milisegundos, así que los ids
+# generados se ordenan cronológicamente como string
+def uuid7():
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    rand_a = rand >> 68
+    rand_b = rand & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | rand_a << 64 | 0b10 << 62 | rand_b
+    return str(uuid.UUID(int=value))
+
+
+# Fecha ISO 8601 en UTC con milisegundos, ordenable lexicográficamente
+def fecha_iso(timestamp=None):
+    if timestamp is None:
+        timestamp = time.time()
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{int(timestamp * 1000) % 1000:03d}Z"
+
+
+# Las eliminaciones hechas por el TTL de DynamoDB llegan en el stream con este userIdentity
+def es_expiracion_ttl(record):
+    identity = record.get("userIdentity") or {}
+    return identity.get("type") == "Service" and identity.get("principalId") == "dynamodb.amazonaws.com"
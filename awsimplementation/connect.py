@@ -1,26 +1,34 @@
-import json
 import boto3
 import logging
 import time
 
+from metricas import instrumentar, log_evento
+from protocolo import preferencias_conexion
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource("dynamodb")
 connections_table = dynamodb.Table("Connections")
 
+@instrumentar
 def lambda_handler(event, context):
     logger.info("=== WebSocket $connect ===")
-    logger.info(json.dumps(event))
+    log_evento(logger, event)
 
     try:
         connection_id = event["requestContext"]["connectionId"]
 
+        # Protocolo negociado por query string (?formato=compacto&gzip=1)
+        formato, usar_gzip = preferencias_conexion(event.get("queryStringParameters"))
+
         # Guardar conexión
         connections_table.put_item(Item={
             "connectionId": connection_id,
             "username": "Anon",
-            "timestamp": int(time.time())
+            "timestamp": int(time.time()),
+            "formato": formato,
+            "gzip": usar_gzip
         })
 
         logger.info(f"Conexión guardada: {connection_id}")
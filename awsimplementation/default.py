@@ -3,6 +3,10 @@ import boto3
 import logging
 import os
 
+from metricas import instrumentar, log_evento
+from estadisticas import obtener_estadisticas
+from protocolo import codificar, preferencias_de_item
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -11,9 +15,10 @@ connections_table = dynamodb.Table("Connections")
 table_name = os.environ.get("TABLE_NAME", "dev-t_reportes")
 reportes_table = dynamodb.Table(table_name)
 
+@instrumentar
 def lambda_handler(event, context):
     logger.info("=== WebSocket $default ===")
-    logger.info(json.dumps(event))
+    log_evento(logger, event)
 
     try:
         connection_id = event["requestContext"]["connectionId"]
@@ -33,37 +38,31 @@ def lambda_handler(event, context):
         if action == "getIncidents":
             # Obtener todos los reportes de dev-t_reportes
             reportes = reportes_table.scan().get("Items", [])
-            
+
+            # Responder en el protocolo que negoció esta conexión
+            conn = connections_table.get_item(Key={"connectionId": connection_id}).get("Item", {})
+
             api.post_to_connection(
                 ConnectionId=connection_id,
-                Data=json.dumps({
+                Data=codificar({
                     "type": "incidentsList",
                     "incidents": reportes
-                })
+                }, *preferencias_de_item(conn))
             )
             return {"statusCode": 200}
 
-        # ----- nuevoReporte -----
-        if action == "nuevoReporte":
-            data = body.get("data", {})
-            
-            # Obtener todas las conexiones activas
-            connections = connections_table.scan().get("Items", [])
-            message = {
-                "type": "nuevoReporte",
-                "data": data
-            }
-
-            # Enviar a todos los clientes conectados
-            for conn in connections:
-                try:
-                    api.post_to_connection(
-                        ConnectionId=conn["connectionId"],
-                        Data=json.dumps(message)
-                    )
-                except Exception as e:
-                    logger.error(f"Error enviando a {conn['connectionId']}: {str(e)}")
+        # ----- getStats -----
+        if action == "getStats":
+            tenant_id = body.get("tenant_id", "utec")
 
+            api.post_to_connection(
+                ConnectionId=connection_id,
+                Data=json.dumps({
+                    "type": "stats",
+                    "tenant_id": tenant_id,
+                    "stats": obtener_estadisticas(tenant_id)
+                })
+            )
             return {"statusCode": 200}
 
         # Acción desconocida
@@ -0,0 +1,46 @@
+import boto3
+import os
+
+from metricas import contar
+from protocolo import CodificadorBroadcast
+
+dynamodb = boto3.resource("dynamodb")
+connections_table = dynamodb.Table(os.environ.get("CONNECTIONS_TABLE", "Connections"))
+
+
+def cliente_ws(endpoint=None):
+    return boto3.client("apigatewaymanagementapi", endpoint_url=endpoint or os.environ["WS_ENDPOINT"])
+
+
+def listar_conexiones():
+    kwargs = {}
+    while True:
+        response = connections_table.scan(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Envía el mensaje a todas las conexiones, cada una en su protocolo y en
+# tantos frames como haga falta. Las conexiones que ya no existen se eliminan
+# de la tabla.
+def difundir(api, mensaje):
+    codificador = CodificadorBroadcast(mensaje)
+    enviados = 0
+
+    for conn in listar_conexiones():
+        try:
+            for data in codificador.para(conn):
+                api.post_to_connection(
+                    ConnectionId=conn["connectionId"],
+                    Data=data
+                )
+            enviados += 1
+        except api.exceptions.GoneException:
+            connections_table.delete_item(Key={"connectionId": conn["connectionId"]})
+        except Exception as e:
+            print(f"⚠️ Error enviando a {conn.get('connectionId', 'unknown')}: {str(e)}")
+
+    contar("Fanout", enviados)
+    return enviados
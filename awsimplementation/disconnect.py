@@ -1,16 +1,18 @@
-import json
 import boto3
 import logging
 
+from metricas import instrumentar, log_evento
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 dynamodb = boto3.resource("dynamodb")
 connections_table = dynamodb.Table("Connections")
 
+@instrumentar
 def lambda_handler(event, context):
     logger.info("=== WebSocket $disconnect ===")
-    logger.info(json.dumps(event))
+    log_evento(logger, event)
 
     try:
         connection_id = event["requestContext"]["connectionId"]
@@ -0,0 +1,97 @@
+import boto3
+import os
+
+# Contadores por tenant (un item por tenant) que se actualizan en cada escritura
+# para que el dashboard no tenga que descargar todos los reportes
+dynamodb = boto3.resource("dynamodb")
+estadisticas_table = dynamodb.Table(os.environ.get("STATS_TABLE", "dev-t_estadisticas"))
+
+
+def _campo_estado(estado):
+    return f"estado_{estado}"
+
+
+def _campo_urgencia(urgencia):
+    return f"urgencia_{(urgencia or 'media').lower()}"
+
+
+def _actualizacion(tenant_id, deltas):
+    deltas = {campo: delta for campo, delta in deltas.items() if delta}
+    if not deltas:
+        return None
+
+    names = {}
+    values = {}
+    partes = []
+    for i, (campo, delta) in enumerate(deltas.items()):
+        names[f"#c{i}"] = campo
+        values[f":v{i}"] = delta
+        partes.append(f"#c{i} :v{i}")
+
+    return {
+        "Key": {"tenant_id": tenant_id},
+        "UpdateExpression": "ADD " + ", ".join(partes),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values
+    }
+
+
+def _sumar(tenant_id, deltas):
+    actualizacion = _actualizacion(tenant_id, deltas)
+    if actualizacion:
+        estadisticas_table.update_item(**actualizacion)
+
+
+# Contadores que suma un reporte: total, su estado y su urgencia
+def campos_reporte(reporte):
+    return {
+        "total": 1,
+        _campo_estado(reporte.get("estado", "pendiente")): 1,
+        _campo_urgencia(reporte.get("nivel_urgencia")): 1
+    }
+
+
+# Update de registrar_creacion para usarlo dentro de una transacción
+def actualizacion_creacion(reporte):
+    return {
+        "TableName": estadisticas_table.name,
+        **_actualizacion(reporte["tenant_id"], campos_reporte(reporte))
+    }
+
+
+def registrar_creacion(reporte):
+    _sumar(reporte["tenant_id"], campos_reporte(reporte))
+
+
+def registrar_eliminacion(reporte):
+    _sumar(reporte["tenant_id"], {
+        campo: -delta for campo, delta in campos_reporte(reporte).items()
+    })
+
+
+def registrar_cambio_estado(tenant_id, estado_anterior, estado_nuevo):
+    if estado_anterior == estado_nuevo:
+        return
+
+    _sumar(tenant_id, {
+        _campo_estado(estado_anterior): -1,
+        _campo_estado(estado_nuevo): 1
+    })
+
+
+# Reemplaza todos los contadores de un tenant (lo usa el backfill)
+def guardar_estadisticas(tenant_id, contadores):
+    estadisticas_table.put_item(Item={"tenant_id": tenant_id, **contadores})
+
+
+def obtener_estadisticas(tenant_id):
+    item = estadisticas_table.get_item(Key={"tenant_id": tenant_id}).get("Item", {})
+
+    stats = {"total": int(item.get("total", 0)), "por_estado": {}, "por_urgencia": {}}
+    for campo, valor in item.items():
+        if campo.startswith("estado_"):
+            stats["por_estado"][campo[len("estado_"):]] = int(valor)
+        elif campo.startswith("urgencia_"):
+            stats["por_urgencia"][campo[len("urgencia_"):]] = int(valor)
+
+    return stats
@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.parse import unquote
+
+import boto3
+import yaml
+from aiohttp import web, WSMsgType
+
+# Gateway local (HTTP + WebSocket) que monta las funciones de serverless.yml
+# con la misma forma de eventos que API Gateway, para desarrollo y pruebas de
+# carga con muchos clientes WebSocket.
+#
+#   pip install -r requirements-local.txt
+#   AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000 \
+#   AWS_ENDPOINT_URL_DYNAMODBSTREAMS=http://localhost:8000 \
+#   python gateway_local.py --port 3001
+#
+# - Rutas REST: eventos http de cada función (integration: lambda o proxy)
+# - WebSocket: ws://host:port/<stage> con $connect, $disconnect y $default
+# - post_to_connection se intercepta con un hook de botocore y se entrega
+#   al socket local correspondiente
+# - Los eventos stream de DynamoDB se emulan leyendo el stream de la tabla
+# - Los handlers se ejecutan en paralelo en un pool de hilos (--workers)
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+CORS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS"
+}
+
+
+def resolver_variables(valor, stage, provider_env):
+    if not isinstance(valor, str):
+        return valor
+
+    def reemplazar(match):
+        expresion = match.group(1)
+        if expresion == "sls:stage":
+            return stage
+        if expresion.startswith("self:provider.environment."):
+            return str(provider_env.get(expresion.split(".")[-1], ""))
+        if expresion.startswith("env:"):
+            nombre, _, defecto = expresion[4:].partition(",")
+            return os.environ.get(nombre.strip(), defecto.strip())
+        return match.group(0)
+
+    return re.sub(r"\$\{([^}]+)\}", reemplazar, valor)
+
+
+def cargar_config(ruta, stage):
+    with open(ruta) as f:
+        config = yaml.safe_load(f)
+
+    provider_env = {}
+    for nombre, valor in (config.get("provider", {}).get("environment") or {}).items():
+        provider_env[nombre] = resolver_variables(valor, stage, provider_env)
+
+    tablas = {}
+    for logical_id, recurso in (config.get("resources", {}).get("Resources") or {}).items():
+        if recurso.get("Type") == "AWS::DynamoDB::Table":
+            tablas[logical_id] = resolver_variables(recurso["Properties"]["TableName"], stage, provider_env)
+
+    return config, provider_env, tablas
+
+
+# Un evento stream coincide si cumple alguno de los filterPatterns
+def coincide_filtro(record, patron):
+    for clave, esperado in patron.items():
+        valor = record.get(clave)
+        if isinstance(esperado, dict):
+            if not isinstance(valor, dict) or not coincide_filtro(valor, esperado):
+                return False
+        elif valor not in esperado:
+            return False
+    return True
+
+
+class ContextoLocal:
+    def __init__(self, nombre, timeout):
+        self.function_name = nombre
+        self.aws_request_id = str(uuid.uuid4())
+        self.memory_limit_in_mb = 0
+        self._fin = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(int((self._fin - time.monotonic()) * 1000), 0)
+
+
+class GatewayLocal:
+    def __init__(self, config, provider_env, tablas, host, port, stage, workers):
+        self.config = config
+        self.tablas = tablas
+        self.host = host
+        self.port = port
+        self.stage = stage
+        self.timeout = config.get("provider", {}).get("timeout", 30)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.loop = None
+        self.conexiones = {}
+        self.tareas = set()
+
+        # Todos los handlers comparten proceso, así que se une el environment
+        # del provider con el de cada función
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        os.environ.update({k: str(v) for k, v in provider_env.items()})
+        for funcion in config.get("functions", {}).values():
+            for nombre, valor in (funcion.get("environment") or {}).items():
+                if isinstance(valor, str):
+                    os.environ[nombre] = resolver_variables(valor, stage, provider_env)
+        os.environ["WS_ENDPOINT"] = f"http://{host}:{port}/{stage}"
+
+        # metricas registra sus hooks antes que el interceptor, y ambos antes
+        # de que los handlers creen sus clientes
+        sys.path.insert(0, DIRECTORIO)
+        importlib.import_module("metricas")
+        boto3._get_default_session().events.register("before-call", self._management_api)
+
+        self.handlers = {}
+        for nombre, funcion in config.get("functions", {}).items():
+            modulo, _, atributo = funcion["handler"].rpartition(".")
+            self.handlers[nombre] = getattr(importlib.import_module(modulo), atributo)
+
+    # ---------- Invocación ----------
+
+    async def invocar(self, nombre, event):
+        contexto = ContextoLocal(nombre, self.timeout)
+        return await self.loop.run_in_executor(self.executor, self.handlers[nombre], event, contexto)
+
+    def _request_context(self, **extra):
+        return {
+            "domainName": f"{self.host}:{self.port}",
+            "stage": self.stage,
+            "apiId": "local",
+            "requestId": str(uuid.uuid4()),
+            "requestTimeEpoch": int(time.time() * 1000),
+            **extra
+        }
+
+    # ---------- Management API ----------
+
+    def _respuesta_http(self, status):
+        return SimpleNamespace(status_code=status, headers={}, content=b"", raw=None)
+
+    # Se ejecuta en el hilo del handler: entrega el mensaje al socket local
+    def _management_api(self, model, params, **kwargs):
+        if model.service_model.service_name != "apigatewaymanagementapi":
+            return None
+
+        connection_id = unquote(params["url_path"].rsplit("/", 1)[-1])
+        ws = self.conexiones.get(connection_id)
+        if ws is None or ws.closed:
+            return (self._respuesta_http(410), {
+                "Error": {"Code": "GoneException", "Message": f"Conexión {connection_id} cerrada"},
+                "ResponseMetadata": {"HTTPStatusCode": 410}
+            })
+
+        if model.name == "PostToConnection":
+            data = params["body"]
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            asyncio.run_coroutine_threadsafe(ws.send_str(data), self.loop).result(timeout=self.timeout)
+        elif model.name == "DeleteConnection":
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop).result(timeout=self.timeout)
+
+        return (self._respuesta_http(200), {"ResponseMetadata": {"HTTPStatusCode": 200}})
+
+    # ---------- REST ----------
+
+    def _ruta_rest(self, nombre, http):
+        integracion = http.get("integration", "lambda-proxy")
+        recurso = "/" + http["path"].strip().strip("/")
+
+        async def handler(request):
+            body = await request.text()
+            event = {
+                "resource": recurso,
+                "path": request.path,
+                "httpMethod": request.method,
+                "headers": dict(request.headers),
+                "queryStringParameters": dict(request.query) or None,
+                "pathParameters": dict(request.match_info) or None,
+                "body": body or None,
+                "isBase64Encoded": False,
+                "requestContext": self._request_context(httpMethod=request.method, path=request.path)
+            }
+
+            try:
+                resultado = await self.invocar(nombre, event)
+            except Exception as e:
+                print(f"❌ Error en {nombre}: {str(e)}")
+                return web.json_response({"message": "Internal server error"}, status=502, headers=CORS)
+
+            # Con integración lambda API Gateway devuelve el resultado completo como JSON
+            if integracion == "lambda":
+                return web.Response(text=json.dumps(resultado), content_type="application/json", headers=CORS)
+
+            resultado = resultado or {}
+            return web.Response(
+                status=resultado.get("statusCode", 200),
+                text=resultado.get("body") or "",
+                headers={**CORS, **(resultado.get("headers") or {})}
+            )
+
+        return recurso, handler
+
+    # ---------- WebSocket ----------
+
+    def _ruta_ws(self, routes, body):
+        # Devuelve (routeKey, función) como la route selection expression
+        # $request.body.action de API Gateway
+        try:
+            action = json.loads(body).get("action")
+        except (ValueError, AttributeError):
+            action = None
+        if isinstance(action, str) and action in routes:
+            return action, routes[action]
+        if "$default" in routes:
+            return "$default", routes["$default"]
+        return None, None
+
+    def _en_segundo_plano(self, coro):
+        tarea = asyncio.ensure_future(coro)
+        self.tareas.add(tarea)
+        tarea.add_done_callback(self.tareas.discard)
+
+    async def _invocar_ws(self, nombre, event):
+        try:
+            return await self.invocar(nombre, event)
+        except Exception as e:
+            print(f"❌ Error en {nombre}: {str(e)}")
+
+    def _handler_ws(self, routes):
+        async def handler(request):
+            connection_id = uuid.uuid4().hex[:16]
+            contexto = {"connectionId": connection_id, "connectedAt": int(time.time() * 1000)}
+
+            if "$connect" in routes:
+                resultado = await self._invocar_ws(routes["$connect"], {
+                    "headers": dict(request.headers),
+                    "queryStringParameters": dict(request.query) or None,
+                    "isBase64Encoded": False,
+                    "requestContext": self._request_context(routeKey="$connect", eventType="CONNECT", **contexto)
+                })
+                if not resultado or resultado.get("statusCode") != 200:
+                    return web.Response(status=403)
+
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            self.conexiones[connection_id] = ws
+
+            try:
+                async for msg in ws:
+                    if msg.type != WSMsgType.TEXT:
+                        continue
+                    route_key, nombre = self._ruta_ws(routes, msg.data)
+                    if nombre is None:
+                        continue
+                    # Como en API Gateway, cada mensaje es una invocación independiente
+                    self._en_segundo_plano(self._invocar_ws(nombre, {
+                        "body": msg.data,
+                        "isBase64Encoded": False,
+                        "requestContext": self._request_context(routeKey=route_key, eventType="MESSAGE", messageId=uuid.uuid4().hex, **contexto)
+                    }))
+            finally:
+                self.conexiones.pop(connection_id, None)
+                if "$disconnect" in routes:
+                    self._en_segundo_plano(self._invocar_ws(routes["$disconnect"], {
+                        "isBase64Encoded": False,
+                        "requestContext": self._request_context(routeKey="$disconnect", eventType="DISCONNECT", **contexto)
+                    }))
+
+            return ws
+
+        return handler
+
+    # ---------- Streams de DynamoDB ----------
+
+    def _leer_stream(self, streams, stream_arn, iteradores, inicio):
+        # Los shards que existen al arrancar se leen desde "inicio"; los que
+        # aparecen después (al rotar el shard) desde el principio
+        primera_lectura = not iteradores
+        shards = streams.describe_stream(StreamArn=stream_arn)["StreamDescription"]["Shards"]
+        for shard in shards:
+            if shard["ShardId"] not in iteradores:
+                iteradores[shard["ShardId"]] = streams.get_shard_iterator(
+                    StreamArn=stream_arn,
+                    ShardId=shard["ShardId"],
+                    ShardIteratorType=inicio if primera_lectura else "TRIM_HORIZON"
+                )["ShardIterator"]
+
+        records = []
+        for shard_id, iterador in list(iteradores.items()):
+            if iterador is None:
+                continue
+            response = streams.get_records(ShardIterator=iterador)
+            iteradores[shard_id] = response.get("NextShardIterator")
+            for record in response.get("Records", []):
+                record["eventSourceARN"] = stream_arn
+                creado = record["dynamodb"].get("ApproximateCreationDateTime")
+                if isinstance(creado, datetime):
+                    record["dynamodb"]["ApproximateCreationDateTime"] = creado.timestamp()
+                records.append(record)
+
+        return records
+
+    async def consumir_stream(self, nombre, stream):
+        logical_id = stream["arn"]["Fn::GetAtt"][0]
+        tabla = self.tablas[logical_id]
+        ventana = float(resolver_variables(str(stream.get("maximumBatchingWindow", 1)), self.stage, {}) or 1)
+        tamano = int(stream.get("batchSize", 100))
+        filtros = stream.get("filterPatterns") or []
+
+        dynamodb = boto3.client("dynamodb")
+        streams = boto3.client("dynamodbstreams")
+        descripcion = await self.loop.run_in_executor(self.executor, lambda: dynamodb.describe_table(TableName=tabla))
+        stream_arn = descripcion["Table"].get("LatestStreamArn")
+        if not stream_arn:
+            print(f"⚠️ La tabla {tabla} no tiene stream, {nombre} no se ejecutará")
+            return
+
+        print(f"🔁 {nombre} consumiendo el stream de {tabla} cada {ventana}s")
+        iteradores = {}
+        while True:
+            try:
+                records = await self.loop.run_in_executor(
+                    self.executor, self._leer_stream, streams, stream_arn, iteradores, "LATEST"
+                )
+                if filtros:
+                    records = [r for r in records if any(coincide_filtro(r, f) for f in filtros)]
+                for i in range(0, len(records), tamano):
+                    await self._invocar_ws(nombre, {"Records": records[i:i + tamano]})
+            except Exception as e:
+                print(f"⚠️ Error leyendo el stream de {tabla}: {str(e)}")
+            await asyncio.sleep(ventana)
+
+    # ---------- Arranque ----------
+
+    def crear_app(self, con_streams=True):
+        app = web.Application()
+        routes_rest = []
+        routes_ws = {}
+
+        for nombre, funcion in self.config.get("functions", {}).items():
+            for evento in funcion.get("events") or []:
+                if "http" in evento:
+                    recurso, handler = self._ruta_rest(nombre, evento["http"])
+                    routes_rest.append((recurso, evento["http"]["method"].upper(), handler, nombre))
+                elif "websocket" in evento:
+                    routes_ws[evento["websocket"]["route"]] = nombre
+                    print(f"🔌 WS {evento['websocket']['route']} -> {nombre}")
+
+        # Como en API Gateway, las rutas fijas (/reporte/stats) tienen prioridad
+        # sobre las que tienen parámetros (/reporte/{uuid})
+        routes_rest.sort(key=lambda r: r[0].count("{"))
+
+        async def preflight(request):
+            return web.Response(headers=CORS)
+
+        con_options = set()
+        for recurso, metodo, handler, nombre in routes_rest:
+            app.router.add_route(metodo, recurso, handler)
+            if recurso not in con_options:
+                app.router.add_route("OPTIONS", recurso, preflight)
+                con_options.add(recurso)
+            print(f"🌐 {metodo:6} {recurso} -> {nombre}")
+
+        app.router.add_get(f"/{self.stage}", self._handler_ws(routes_ws))
+
+        async def al_iniciar(app):
+            self.loop = asyncio.get_running_loop()
+            if not con_streams:
+                return
+            for nombre, funcion in self.config.get("functions", {}).items():
+                for evento in funcion.get("events") or []:
+                    stream = evento.get("stream")
+                    if isinstance(stream, dict) and stream.get("type") == "dynamodb":
+                        self._en_segundo_plano(self.consumir_stream(nombre, stream))
+
+        async def al_cerrar(app):
+            for tarea in list(self.tareas):
+                tarea.cancel()
+            self.executor.shutdown(wait=False)
+
+        app.on_startup.append(al_iniciar)
+        app.on_cleanup.append(al_cerrar)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway local para las funciones de serverless.yml")
+    parser.add_argument("--config", default=os.path.join(DIRECTORIO, "serverless.yml"))
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--stage", default="dev")
+    parser.add_argument("--workers", type=int, default=64, help="Invocaciones concurrentes de handlers")
+    parser.add_argument("--sin-streams", action="store_true", help="No emular los eventos stream de DynamoDB")
+    args = parser.parse_args()
+
+    config, provider_env, tablas = cargar_config(args.config, args.stage)
+    gateway = GatewayLocal(config, provider_env, tablas, args.host, args.port, args.stage, args.workers)
+
+    print(f"🚀 HTTP en http://{args.host}:{args.port} y WebSocket en ws://{args.host}:{args.port}/{args.stage}")
+    web.run_app(gateway.crear_app(con_streams=not args.sin_streams), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import boto3
+import hashlib
+import json
+import os
+import time
+
+# Claves de idempotencia para absorber reintentos del cliente: la primera
+# solicitud reserva la clave con una escritura condicional y guarda su
+# respuesta; los reintentos reciben esa misma respuesta sin volver a escribir.
+# La reserva en proceso tiene un lease corto: si la Lambda muere antes de
+# guardar la respuesta, un reintento posterior puede retomarla. El item guarda
+# en "pasos" las escrituras derivadas ya hechas, para que quien la retome
+# complete solo las que faltan.
+dynamodb = boto3.resource("dynamodb")
+idempotencia_table = dynamodb.Table(os.environ.get("IDEMPOTENCY_TABLE", "dev-t_idempotencia"))
+
+# Tiempo que se recuerda una clave (TTL de DynamoDB)
+TTL_SEGUNDOS = int(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+
+# Tiempo que una reserva en proceso bloquea los reintentos (mayor que el timeout de la Lambda)
+LEASE_SEGUNDOS = int(os.environ.get("IDEMPOTENCY_LEASE", "60"))
+
+EN_PROCESO = "en_proceso"
+COMPLETADO = "completado"
+
+
+def obtener_clave(event, body):
+    headers = event.get("headers") or {}
+    for nombre, valor in headers.items():
+        if nombre.lower() == "idempotency-key" and valor:
+            return valor
+    return body.get("idempotency_key")
+
+
+def _id(tenant_id, clave):
+    return f"{tenant_id}#{clave}"
+
+
+# Hash del body para detectar una clave reutilizada con otro contenido
+def hash_solicitud(body):
+    contenido = json.dumps(body, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+# Devuelve (True, item) si la clave quedó reservada para esta solicitud, o
+# (False, item) con el item existente si otra solicitud ya la usa. Al retomar
+# una reserva vencida, item["uuid"] es el del reporte de la primera solicitud.
+def reservar(tenant_id, clave, hash_body, uuid_reporte):
+    ahora = int(time.time())
+    item = {
+        "clave": _id(tenant_id, clave),
+        "estado": EN_PROCESO,
+        "hash": hash_body,
+        "uuid": uuid_reporte,
+        "bloqueado_hasta": ahora + LEASE_SEGUNDOS,
+        "expira_en": ahora + TTL_SEGUNDOS,
+        "pasos": {}
+    }
+
+    # El TTL de DynamoDB borra con retraso: una clave expirada cuenta como libre
+    try:
+        idempotencia_table.put_item(
+            Item=item,
+            ConditionExpression="attribute_not_exists(clave) OR expira_en < :ahora",
+            ExpressionAttributeValues={":ahora": ahora}
+        )
+        return True, item
+    except idempotencia_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+    existente = idempotencia_table.get_item(
+        Key={"clave": _id(tenant_id, clave)},
+        ConsistentRead=True
+    ).get("Item")
+
+    # Liberada entre el put y el get: se trata como en proceso y el cliente reintenta
+    if existente is None:
+        return False, {"estado": EN_PROCESO, "hash": hash_body}
+
+    if existente.get("hash") != hash_body or existente.get("estado") != EN_PROCESO:
+        return False, existente
+
+    if int(existente.get("bloqueado_hasta", 0)) >= ahora:
+        return False, existente
+
+    # Lease vencido: solo un reintento puede retomarlo
+    try:
+        idempotencia_table.update_item(
+            Key={"clave": _id(tenant_id, clave)},
+            UpdateExpression="SET bloqueado_hasta = :nuevo, pasos = if_not_exists(pasos, :vacio)",
+            ConditionExpression="estado = :e AND bloqueado_hasta = :anterior",
+            ExpressionAttributeValues={
+                ":nuevo": ahora + LEASE_SEGUNDOS,
+                ":vacio": {},
+                ":e": EN_PROCESO,
+                ":anterior": existente["bloqueado_hasta"]
+            }
+        )
+    except idempotencia_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False, existente
+
+    print(f"🔓 Reserva vencida de la clave {clave} retomada")
+    return True, existente
+
+
+# Marca el paso como hecho. Si se pasa el update de la escritura derivada
+# (con TableName), ambos van en una transacción: los contadores usan ADD y no
+# se pueden repetir, así que la escritura y su marca ocurren juntas o ninguna.
+def registrar_paso(tenant_id, clave, paso, actualizacion=None):
+    marca = {
+        "TableName": idempotencia_table.name,
+        "Key": {"clave": _id(tenant_id, clave)},
+        "UpdateExpression": "SET pasos.#p = :hecho",
+        "ConditionExpression": "attribute_not_exists(pasos.#p)",
+        "ExpressionAttributeNames": {"#p": paso},
+        "ExpressionAttributeValues": {":hecho": True}
+    }
+    cliente = idempotencia_table.meta.client
+
+    if actualizacion is None:
+        try:
+            idempotencia_table.update_item(**{k: v for k, v in marca.items() if k != "TableName"})
+        except cliente.exceptions.ConditionalCheckFailedException:
+            pass
+        return
+
+    # El cliente del resource serializa los valores igual que Table.update_item
+    try:
+        cliente.transact_write_items(TransactItems=[{"Update": actualizacion}, {"Update": marca}])
+    except cliente.exceptions.TransactionCanceledException as e:
+        # Si falló solo la condición de la marca, otra invocación ya hizo el paso
+        motivos = e.response.get("CancellationReasons", [])
+        if len(motivos) == 2 and motivos[1].get("Code") == "ConditionalCheckFailed":
+            return
+        raise
+
+
+def guardar_respuesta(tenant_id, clave, respuesta):
+    idempotencia_table.update_item(
+        Key={"clave": _id(tenant_id, clave)},
+        UpdateExpression="SET estado = :e, respuesta = :r",
+        ExpressionAttributeValues={":e": COMPLETADO, ":r": json.dumps(respuesta)}
+    )
+
+
+# Si la solicitud falló, se libera la clave para que el reintento pueda procesarse
+def liberar(tenant_id, clave):
+    idempotencia_table.delete_item(Key={"clave": _id(tenant_id, clave)})
+
+
+def respuesta_guardada(item, hash_body):
+    if item.get("hash") != hash_body:
+        return {
+            "statusCode": 422,
+            "body": json.dumps({"error": "La Idempotency-Key ya se usó con un contenido distinto"})
+        }
+
+    if item.get("estado") == COMPLETADO and "respuesta" in item:
+        return json.loads(item["respuesta"])
+
+    return {
+        "statusCode": 409,
+        "body": json.dumps({"error": "Hay una solicitud con la misma clave en proceso"})
+    }
@@ -0,0 +1,152 @@
+import boto3
+import contextvars
+import functools
+import json
+import os
+import random
+import time
+
+# Instrumentación compartida de los handlers: duración, cold start, llamadas a
+# AWS (cantidad, latencia, capacidad consumida), tamaño de respuesta y fan-out.
+# Se emite una línea JSON por invocación en formato EMF de CloudWatch.
+#
+# Los hooks se registran en la sesión por defecto de boto3, y los clientes
+# copian los hooks al crearse: este módulo debe importarse antes de crear
+# cualquier cliente o recurso.
+
+NAMESPACE = os.environ.get("METRICAS_NAMESPACE", "Reportes")
+
+# Fracción de invocaciones que loguean el evento completo
+MUESTREO_EVENTO = float(os.environ.get("LOG_EVENTO_MUESTREO", "0.01"))
+
+# Operaciones de DynamoDB que aceptan ReturnConsumedCapacity
+OPERACIONES_CAPACIDAD = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems"
+}
+
+_actual = contextvars.ContextVar("metricas_actual", default=None)
+_cold_start = True
+
+
+def _antes_de_llamada(model, context, **kwargs):
+    context["metricas_inicio"] = time.perf_counter()
+
+
+def _despues_de_llamada(http_response, parsed, model, context, **kwargs):
+    metricas = _actual.get()
+    inicio = context.get("metricas_inicio")
+    if metricas is None or inicio is None:
+        return
+
+    nombre = f"{model.service_model.service_name}.{model.name}"
+    llamada = metricas["llamadas"].setdefault(nombre, {"cantidad": 0, "ms": 0.0})
+    llamada["cantidad"] += 1
+    llamada["ms"] += (time.perf_counter() - inicio) * 1000
+
+    capacidad = parsed.get("ConsumedCapacity") if isinstance(parsed, dict) else None
+    if isinstance(capacidad, dict):
+        capacidad = [capacidad]
+    for c in capacidad or []:
+        metricas["capacidad"] += c.get("CapacityUnits", 0)
+
+
+def _pedir_capacidad(params, model, **kwargs):
+    if model.name in OPERACIONES_CAPACIDAD and _actual.get() is not None:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+_eventos = boto3._get_default_session().events
+_eventos.register("before-call", _antes_de_llamada)
+_eventos.register("after-call", _despues_de_llamada)
+_eventos.register("before-parameter-build.dynamodb", _pedir_capacidad)
+
+
+def contar(nombre, valor=1):
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas["contadores"][nombre] = metricas["contadores"].get(nombre, 0) + valor
+
+
+def log_evento(logger, event):
+    if random.random() < MUESTREO_EVENTO:
+        logger.info(json.dumps(event, default=str))
+
+
+def _tamano_respuesta(respuesta):
+    if isinstance(respuesta, dict) and isinstance(respuesta.get("body"), str):
+        return len(respuesta["body"].encode("utf-8"))
+    try:
+        return len(json.dumps(respuesta, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+# Los handlers capturan sus excepciones y devuelven 500, así que una
+# respuesta 5xx también cuenta como error
+def _es_error(respuesta, error):
+    if error is not None:
+        return True
+    if not isinstance(respuesta, dict):
+        return False
+    try:
+        return int(respuesta.get("statusCode", 0)) >= 500
+    except (TypeError, ValueError):
+        return False
+
+
+def _emitir(funcion, metricas, duracion_ms, cold_start, respuesta, error):
+    llamadas = metricas["llamadas"]
+    valores = {
+        "Duracion": (round(duracion_ms, 2), "Milliseconds"),
+        "ColdStart": (1 if cold_start else 0, "Count"),
+        "LlamadasAWS": (sum(l["cantidad"] for l in llamadas.values()), "Count"),
+        "LatenciaAWS": (round(sum(l["ms"] for l in llamadas.values()), 2), "Milliseconds"),
+        "CapacidadConsumida": (metricas["capacidad"], "Count"),
+        "TamanoRespuesta": (_tamano_respuesta(respuesta), "Bytes"),
+        "Error": (1 if _es_error(respuesta, error) else 0, "Count")
+    }
+    for nombre, valor in metricas["contadores"].items():
+        valores[nombre] = (valor, "Count")
+
+    linea = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Funcion"]],
+                "Metrics": [{"Name": n, "Unit": u} for n, (_, u) in valores.items()]
+            }]
+        },
+        "Funcion": funcion,
+        "llamadas": {n: {"cantidad": l["cantidad"], "ms": round(l["ms"], 2)} for n, l in llamadas.items()}
+    }
+    linea.update({n: v for n, (v, _) in valores.items()})
+
+    print(json.dumps(linea))
+
+
+def instrumentar(handler):
+    funcion = handler.__module__
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+        cold_start, _cold_start = _cold_start, False
+
+        metricas = {"llamadas": {}, "capacidad": 0, "contadores": {}}
+        token = _actual.set(metricas)
+        inicio = time.perf_counter()
+        respuesta = None
+        error = None
+        try:
+            respuesta = handler(event, context)
+            return respuesta
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _actual.reset(token)
+            _emitir(funcion, metricas, (time.perf_counter() - inicio) * 1000, cold_start, respuesta, error)
+
+    return wrapper
@@ -0,0 +1,61 @@
+import boto3
+import os
+import time
+import uuid
+
+from comun import fecha_iso
+
+# Migración única: agrega fecha_creacion a los reportes creados antes de que
+# existiera, para que aparezcan en el índice tenant_fecha.
+# Uso: TABLE_NAME=dev-t_reportes python migrar_fechas.py
+
+
+def fecha_desde_uuid(valor, por_defecto):
+    try:
+        u = uuid.UUID(valor)
+    except ValueError:
+        return por_defecto
+
+    # Los UUIDv7 llevan el timestamp en milisegundos en los primeros 48 bits
+    if u.version == 7:
+        return fecha_iso((u.int >> 80) / 1000)
+
+    # Los uuid4 antiguos no guardan la fecha; se usa la de la migración
+    return por_defecto
+
+
+def main():
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(os.environ.get("TABLE_NAME", "dev-t_reportes"))
+
+    por_defecto = fecha_iso(time.time())
+    migrados = 0
+    kwargs = {
+        "FilterExpression": "attribute_not_exists(fecha_creacion)",
+        "ProjectionExpression": "tenant_id, #u",
+        "ExpressionAttributeNames": {"#u": "uuid"}
+    }
+
+    while True:
+        response = table.scan(**kwargs)
+
+        for item in response.get("Items", []):
+            try:
+                table.update_item(
+                    Key={"tenant_id": item["tenant_id"], "uuid": item["uuid"]},
+                    UpdateExpression="SET fecha_creacion = if_not_exists(fecha_creacion, :f)",
+                    ExpressionAttributeValues={":f": fecha_desde_uuid(item["uuid"], por_defecto)}
+                )
+                migrados += 1
+            except Exception as e:
+                print(f"⚠️ Error migrando {item['uuid']}: {str(e)}")
+
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    print(f"✅ Reportes migrados: {migrados}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import base64
+import gzip
+import json
+
+from comun import json_default
+
+# Protocolo compacto para WebSocket, negociado en $connect con
+# ?formato=compacto y opcionalmente &gzip=1. Los clientes que no lo piden
+# siguen recibiendo el JSON de siempre.
+FORMATO_JSON = "json"
+FORMATO_COMPACTO = "compacto"
+
+# Nombres cortos para los campos del reporte
+CAMPOS_CORTOS = {
+    "tenant_id": "t",
+    "uuid": "u",
+    "tipo_incidente": "ti",
+    "nivel_urgencia": "n",
+    "ubicacion": "ub",
+    "tipo_usuario": "tu",
+    "descripcion": "d",
+    "estado": "e",
+    "fecha_creacion": "f",
+    "ubicacion_codigo": "uc",
+    "expira_en": "x"
+}
+
+# Solo vale la pena comprimir mensajes grandes
+UMBRAL_GZIP = 1024
+
+# post_to_connection rechaza frames de más de 128 KB; se deja margen
+LIMITE_FRAME = 120 * 1024
+
+# Listas de un mensaje que se pueden repartir en varios frames
+CAMPOS_DIVISIBLES = ("reportes", "eliminados")
+
+
+def preferencias_conexion(query_params):
+    query_params = query_params or {}
+    formato = FORMATO_COMPACTO if query_params.get("formato") == FORMATO_COMPACTO else FORMATO_JSON
+    usar_gzip = query_params.get("gzip") in ("1", "true")
+    return formato, usar_gzip
+
+
+def compactar_reporte(reporte):
+    return {CAMPOS_CORTOS.get(k, k): v for k, v in reporte.items()}
+
+
+# Lista de reportes en formato columnar: las claves se envían una sola vez
+def compactar_lista(reportes):
+    columnas = []
+    for reporte in reportes:
+        for campo in reporte:
+            if campo not in columnas:
+                columnas.append(campo)
+
+    return {
+        "cols": [CAMPOS_CORTOS.get(c, c) for c in columnas],
+        "rows": [[reporte.get(c) for c in columnas] for reporte in reportes]
+    }
+
+
+def compactar_mensaje(mensaje):
+    compacto = dict(mensaje)
+    for campo in ("incidents", "reportes"):
+        if campo in compacto:
+            compacto[campo] = compactar_lista(compacto[campo])
+    if isinstance(compacto.get("data"), dict):
+        compacto["data"] = compactar_reporte(compacto["data"])
+    return compacto
+
+
+def codificar(mensaje, formato=FORMATO_JSON, usar_gzip=False):
+    if formato == FORMATO_COMPACTO:
+        mensaje = compactar_mensaje(mensaje)
+        data = json.dumps(mensaje, default=json_default, separators=(",", ":"), ensure_ascii=False)
+    else:
+        data = json.dumps(mensaje, default=json_default)
+
+    if usar_gzip and len(data) > UMBRAL_GZIP:
+        comprimido = base64.b64encode(gzip.compress(data.encode("utf-8"))).decode("ascii")
+        return json.dumps({"type": mensaje.get("type"), "z": comprimido})
+
+    return data
+
+
+def _partir(mensaje):
+    elementos = [(campo, valor) for campo in CAMPOS_DIVISIBLES for valor in mensaje.get(campo) or []]
+    if len(elementos) < 2:
+        return None
+
+    mitad = len(elementos) // 2
+    partes = []
+    for grupo in (elementos[:mitad], elementos[mitad:]):
+        parte = {k: v for k, v in mensaje.items() if k not in CAMPOS_DIVISIBLES}
+        for campo in CAMPOS_DIVISIBLES:
+            if campo in mensaje:
+                parte[campo] = [valor for c, valor in grupo if c == campo]
+        partes.append(parte)
+    return partes
+
+
+# Codifica el mensaje en uno o más frames por debajo de LIMITE_FRAME,
+# repartiendo reportes y eliminados en mitades hasta que cada una entre
+def codificar_en_frames(mensaje, formato=FORMATO_JSON, usar_gzip=False):
+    data = codificar(mensaje, formato, usar_gzip)
+    if len(data.encode("utf-8")) <= LIMITE_FRAME:
+        return [data]
+
+    partes = _partir(mensaje)
+    if partes is None:
+        # Un solo elemento que no entra: se envía igual y difundir registra el error
+        print(f"⚠️ Mensaje {mensaje.get('type')} de {len(data)} caracteres supera el límite de un frame")
+        return [data]
+
+    return [frame for parte in partes for frame in codificar_en_frames(parte, formato, usar_gzip)]
+
+
+def preferencias_de_item(conn):
+    return conn.get("formato", FORMATO_JSON), bool(conn.get("gzip", False))
+
+
+# Serializa el mensaje una vez por variante de protocolo en lugar de una vez por conexión.
+# para() devuelve la lista de frames, porque el tamaño depende del formato
+class CodificadorBroadcast:
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+        self.cache = {}
+
+    def para(self, conn):
+        clave = preferencias_de_item(conn)
+        if clave not in self.cache:
+            self.cache[clave] = codificar_en_frames(self.mensaje, *clave)
+        return self.cache[clave]
@@ -0,0 +1,46 @@
+import boto3
+import os
+from collections import Counter, defaultdict
+
+from estadisticas import campos_reporte, guardar_estadisticas
+
+# Backfill único: reconstruye los contadores de t_estadisticas a partir de
+# los reportes existentes, que se crearon antes de que hubiera contadores.
+# Reemplaza el item de cada tenant, así que se puede volver a correr; conviene
+# hacerlo sin tráfico, porque las escrituras durante el scan no se cuentan.
+# Uso: TABLE_NAME=dev-t_reportes STATS_TABLE=dev-t_estadisticas python reconstruir_estadisticas.py
+
+
+def main():
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(os.environ.get("TABLE_NAME", "dev-t_reportes"))
+
+    contadores = defaultdict(Counter)
+    leidos = 0
+    kwargs = {
+        "ProjectionExpression": "tenant_id, estado, nivel_urgencia"
+    }
+
+    while True:
+        response = table.scan(**kwargs)
+
+        for item in response.get("Items", []):
+            contadores[item["tenant_id"]].update(campos_reporte(item))
+            leidos += 1
+
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    for tenant_id, conteo in contadores.items():
+        try:
+            guardar_estadisticas(tenant_id, dict(conteo))
+            print(f"✅ {tenant_id}: {conteo['total']} reportes")
+        except Exception as e:
+            print(f"⚠️ Error guardando los contadores de {tenant_id}: {str(e)}")
+
+    print(f"✅ Reportes leídos: {leidos}, tenants reconstruidos: {len(contadores)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import boto3
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+
+from busqueda import normalizar
+
+# Conteos de incidentes por ubicación normalizada, agregados en buckets
+# diarios por tenant (un item por tenant, día y ubicación) que se actualizan
+# en cada escritura, para que el mapa no tenga que descargar todos los reportes
+dynamodb = boto3.resource("dynamodb")
+ubicaciones_table = dynamodb.Table(os.environ.get("LOCATIONS_TABLE", "dev-t_ubicaciones"))
+
+# Máximo de días que se pueden consultar de una vez
+MAX_DIAS = 90
+
+# Edificios identificados por tipo + letra/número: "Pabellón A", "edificio 3"
+EDIFICIOS = {
+    "pabellon": "PAB",
+    "edificio": "EDF",
+    "bloque": "BLQ",
+    "torre": "TOR",
+    "aula": "AULA",
+    "salon": "AULA",
+    "laboratorio": "LAB",
+    "lab": "LAB"
+}
+
+# Áreas comunes que no llevan identificador
+AREAS = {
+    "biblioteca": "BIBLIOTECA",
+    "cafeteria": "CAFETERIA",
+    "comedor": "CAFETERIA",
+    "auditorio": "AUDITORIO",
+    "estacionamiento": "ESTACIONAMIENTO",
+    "parqueo": "ESTACIONAMIENTO",
+    "gimnasio": "GIMNASIO",
+    "patio": "PATIO",
+    "entrada": "ENTRADA",
+    "puerta": "ENTRADA",
+    "bano": "BANOS",
+    "banos": "BANOS"
+}
+
+
+# "Pabellón A, piso 3" -> "PAB-A"; "la biblioteca" -> "BIBLIOTECA"
+def canonizar(ubicacion):
+    texto = normalizar(ubicacion)
+
+    match = re.search(r"\b(" + "|".join(EDIFICIOS) + r")\s*(?:n[°o]?\s*)?([a-z]?\d+|[a-z])\b", texto)
+    if match:
+        return f"{EDIFICIOS[match.group(1)]}-{match.group(2).upper()}"
+
+    for palabra in re.findall(r"\w+", texto):
+        if palabra in AREAS:
+            return AREAS[palabra]
+
+    # Sin coincidencias: las primeras palabras como código
+    palabras = re.findall(r"\w+", texto)[:3]
+    return "-".join(palabras).upper() or "DESCONOCIDA"
+
+
+def coordenadas(body):
+    # Coordenadas inválidas se ignoran: el reporte se guarda sin ellas
+    try:
+        lat = Decimal(str(body["lat"]))
+        lng = Decimal(str(body["lng"]))
+    except (KeyError, TypeError, ArithmeticError):
+        return None
+
+    # Decimal acepta "NaN" e "Infinity", que DynamoDB rechaza
+    if not lat.is_finite() or not lng.is_finite():
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def _bucket(tenant_id, dia):
+    return f"{tenant_id}#{dia}"
+
+
+def _actualizacion(reporte, delta):
+    # Solo los reportes con ubicacion_codigo se contaron al crearse; los
+    # anteriores no tienen bucket y restarlos lo dejaría en negativo
+    fecha = reporte.get("fecha_creacion")
+    codigo = reporte.get("ubicacion_codigo")
+    if not fecha or not codigo:
+        return None
+
+    names = {
+        "#tipo": f"tipo_{reporte.get('tipo_incidente')}",
+        "#urgencia": f"urgencia_{(reporte.get('nivel_urgencia') or 'media').lower()}",
+        "#nombre": "nombre",
+        "#total": "total"
+    }
+    values = {":d": delta, ":nombre": reporte.get("ubicacion", "")}
+    sets = ["#nombre = if_not_exists(#nombre, :nombre)"]
+
+    if "lat" in reporte and "lng" in reporte:
+        sets += ["#lat = if_not_exists(#lat, :lat)", "#lng = if_not_exists(#lng, :lng)"]
+        names.update({"#lat": "lat", "#lng": "lng"})
+        values.update({":lat": reporte["lat"], ":lng": reporte["lng"]})
+
+    return {
+        "Key": {"bucket": _bucket(reporte["tenant_id"], fecha[:10]), "ubicacion": codigo},
+        "UpdateExpression": "SET " + ", ".join(sets) + " ADD #total :d, #tipo :d, #urgencia :d",
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values
+    }
+
+
+def _sumar(reporte, delta):
+    actualizacion = _actualizacion(reporte, delta)
+    if actualizacion:
+        ubicaciones_table.update_item(**actualizacion)
+
+
+# Update de registrar_ubicacion para usarlo dentro de una transacción;
+# None si el reporte no se cuenta
+def actualizacion_ubicacion(reporte):
+    actualizacion = _actualizacion(reporte, 1)
+    if actualizacion is None:
+        return None
+    return {"TableName": ubicaciones_table.name, **actualizacion}
+
+
+def registrar_ubicacion(reporte):
+    _sumar(reporte, 1)
+
+
+def quitar_ubicacion(reporte):
+    _sumar(reporte, -1)
+
+
+def _dias(desde, hasta):
+    dia = desde
+    while dia <= hasta:
+        yield dia.strftime("%Y-%m-%d")
+        dia += timedelta(days=1)
+
+
+def _items_bucket(tenant_id, dia):
+    kwargs = {"KeyConditionExpression": Key("bucket").eq(_bucket(tenant_id, dia))}
+    while True:
+        response = ubicaciones_table.query(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+# Suma los buckets diarios de la ventana [hoy - dias + 1, hoy]
+def hotspots(tenant_id, dias=7):
+    dias = min(max(dias, 1), MAX_DIAS)
+    hasta = datetime.now(timezone.utc).date()
+    desde = hasta - timedelta(days=dias - 1)
+
+    resultado = {}
+    for dia in _dias(desde, hasta):
+        for item in _items_bucket(tenant_id, dia):
+            codigo = item["ubicacion"]
+            ubicacion = resultado.setdefault(codigo, {
+                "ubicacion": codigo,
+                "nombre": item.get("nombre", ""),
+                "total": 0,
+                "por_tipo": {},
+                "por_urgencia": {}
+            })
+            if "lat" in item and "lng" in item and "lat" not in ubicacion:
+                ubicacion["lat"], ubicacion["lng"] = float(item["lat"]), float(item["lng"])
+
+            for campo, valor in item.items():
+                if campo == "total":
+                    ubicacion["total"] += int(valor)
+                elif campo.startswith("tipo_"):
+                    tipo = campo[len("tipo_"):]
+                    ubicacion["por_tipo"][tipo] = ubicacion["por_tipo"].get(tipo, 0) + int(valor)
+                elif campo.startswith("urgencia_"):
+                    urgencia = campo[len("urgencia_"):]
+                    ubicacion["por_urgencia"][urgencia] = ubicacion["por_urgencia"].get(urgencia, 0) + int(valor)
+
+    # Los contadores que volvieron a cero por eliminaciones no se muestran
+    for ubicacion in resultado.values():
+        for campo in ("por_tipo", "por_urgencia"):
+            ubicacion[campo] = {k: v for k, v in ubicacion[campo].items() if v > 0}
+
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "ubicaciones": sorted(
+            (u for u in resultado.values() if u["total"] > 0),
+            key=lambda u: (-u["total"], u["ubicacion"])
+        )
+    }
@@ -86,9 +86,16 @@ function App() {
           setReportes(msg.incidents ?? [])
         }
 
-        // 👉 Nuevo reporte en tiempo real
-        if (msg.type === "nuevoReporte") {
-          setReportes((prev) => [...prev, msg.data])
+        // 👉 Lote de reportes nuevos/actualizados y eliminados
+        if (msg.type === "reportesBatch") {
+          const eliminados: string[] = msg.eliminados ?? []
+          const actualizados: Reporte[] = msg.reportes ?? []
+          setReportes((prev) => {
+            const porUuid = new Map(prev.map((r) => [r.uuid, r]))
+            eliminados.forEach((uuid) => porUuid.delete(uuid))
+            actualizados.forEach((r) => porUuid.set(r.uuid, r))
+            return Array.from(porUuid.values())
+          })
         }
 
         // 👉 newIncident también llega en algunos flujos
@@ -100,9 +100,8 @@ function App() {
           if (data.type === "incidentsList") {
             console.log("Incidentes recibidos:", data.incidents)
             // Aquí podrías actualizar el estado con los incidentes del servidor
-          } else if (data.type === "nuevoReporte") {
-            console.log("Nuevo reporte recibido:", data.data)
-            // Aquí podrías agregar el nuevo reporte a la lista
+          } else if (data.type === "reportesBatch") {
+            console.log("Lote de reportes recibido:", data.reportes, "eliminados:", data.eliminados)
           } else if (data.type === "error") {
             console.error("Error del servidor:", data.message)
           }
@@ -155,16 +154,6 @@ function App() {
 
   console.log("✅ Usuario existe, mostrando app")
 
-  // Función para enviar mensajes por WebSocket
-  const sendWebSocketMessage = (message: any) => {
-    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify(message))
-      console.log("Mensaje enviado por WebSocket:", message)
-    } else {
-      console.warn("WebSocket no está conectado")
-    }
-  }
-
   // ==============================
   // API CALL
   // ==============================
@@ -216,12 +205,8 @@ function App() {
 
     // Intentar enviar al backend
     try {
+      // El backend notifica a los clientes conectados con un reportesBatch
       await crearIncidente(payload)
-      // Enviar notificación por WebSocket también
-      sendWebSocketMessage({
-        action: "nuevoReporte",
-        data: payload
-      })
     } catch (err) {
       console.error("Failed to enviar reporte:", err)
       alert("No se pudo enviar el reporte al servidor.")